@@ -1,9 +1,9 @@
 """Application configuration management."""
 
 from functools import lru_cache
-from typing import Optional
+from typing import Literal, Optional
 
-from pydantic import Field, HttpUrl, PostgresDsn, model_validator
+from pydantic import Field, HttpUrl, PostgresDsn, field_validator, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -15,13 +15,31 @@ class Settings(BaseSettings):
     telegram_bot_token: str = Field(alias="TELEGRAM_BOT_TOKEN")
     database_url: PostgresDsn = Field(alias="DATABASE_URL")
     webhook_url: Optional[HttpUrl] = Field(default=None, alias="WEBHOOK_URL")
+    delete_webhook_on_shutdown: bool = Field(default=False, alias="DELETE_WEBHOOK_ON_SHUTDOWN")
     port: int = Field(default=8000, alias="PORT", ge=1, le=65535)
-    pool_min_size: int = Field(default=1, alias="POOL_MIN_SIZE", ge=1)
-    pool_max_size: int = Field(default=10, alias="POOL_MAX_SIZE", ge=1)
+    log_level: Literal["TRACE", "DEBUG", "INFO", "SUCCESS", "WARNING", "ERROR", "CRITICAL"] = Field(
+        default="INFO", alias="LOG_LEVEL"
+    )
+    # Пул 25 соединений — компромисс между задержкой при всплесках вебхуков
+    # и лимитом max_connections на сервере PostgreSQL
+    pool_min_size: int = Field(default=10, alias="POOL_MIN_SIZE", ge=1)
+    pool_max_size: int = Field(default=25, alias="POOL_MAX_SIZE", ge=1)
+
+    @field_validator("log_level", mode="before")
+    @classmethod
+    def normalize_log_level(cls, value: object) -> object:
+        return value.upper() if isinstance(value, str) else value
 
     @model_validator(mode="after")
     def validate_pool_limits(self) -> "Settings":
-        if self.pool_min_size > self.pool_max_size:
+        if self.pool_min_size <= self.pool_max_size:
+            return self
+        # Значение по умолчанию подстраивается под явно заданное второе
+        if "pool_min_size" not in self.model_fields_set:
+            self.pool_min_size = self.pool_max_size
+        elif "pool_max_size" not in self.model_fields_set:
+            self.pool_max_size = self.pool_min_size
+        else:
             msg = "POOL_MIN_SIZE cannot be greater than POOL_MAX_SIZE"
             raise ValueError(msg)
         return self
@@ -1,20 +1,23 @@
 import asyncio
 import logging
 import sys
+import time
+from collections import OrderedDict
 from contextlib import asynccontextmanager
 from datetime import datetime
 from decimal import Decimal, InvalidOperation
+from functools import lru_cache
 from typing import Any, Optional
 
 import asyncpg
+import orjson
 from aiogram import Bot, Dispatcher, F, types
 from aiogram.filters import CommandStart
 from aiogram.types import KeyboardButton, ReplyKeyboardMarkup, Update
-from dateutil.relativedelta import relativedelta
 from fastapi import FastAPI, Request, Response, status
 from loguru import logger
 from prometheus_fastapi_instrumentator import Instrumentator  # ✨ добавили
-from json import JSONDecodeError
+from pydantic import ValidationError
 
 from config import get_settings
 
@@ -34,14 +37,17 @@ class InterceptHandler(logging.Handler):
         logger.opt(depth=depth, exception=record.exc_info).log(level, record.getMessage())
 
 
+settings = get_settings()
+
 logging.basicConfig(handlers=[InterceptHandler()], level=0)
 logger.remove()
 logger.add(
     sys.stdout,
-    level="INFO",
+    level=settings.log_level,
     format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level} | {name}:{function}:{line} - {message}",
     enqueue=True,
-    backtrace=True,
+    catch=True,
+    backtrace=False,
     diagnose=False,
 )
 
@@ -65,10 +71,9 @@ MSG_START = "Нажмите кнопку Поделиться номером т
 BTN_SHARE_PHONE = "Поделиться номером телефона"
 MSG_INVALID_CONTACT = "❌ Вы можете проверить информацию только для своего номера телефона."
 MSG_NO_BONUS = "Бонусы для указанного номера не найдены."
-MSG_BALANCE_TEMPLATE = "👋 {first_name}, у Вас накоплено бонусов {amount} рублей.\nВаш уровень лояльности — {level}."
-MSG_EXPIRY_TEMPLATE = "\nСрок действия бонусов: до {date}."
 
 # SQL запросы
+# Порядок столбцов важен: parse_guest_info распаковывает строку по позициям
 SQL_FETCH_USER = f"""
 SELECT {COL_FIRST_NAME}, {COL_LOYALTY_LEVEL}, {COL_BONUS_BALANCES}, {COL_LAST_DATE_VISIT}
 FROM {TABLE_BONUSES_BALANCE}
@@ -80,155 +85,387 @@ INSERT INTO {TABLE_TELEGRAM_BOT_STATS} ({COL_USER_ID}, {COL_PHONE_STATS}, {COL_C
 VALUES ($1, $2, $3)
 """
 
+# Параметры пула соединений
+POOL_MAX_INACTIVE_LIFETIME = 300  # секунд
+POOL_MAX_QUERIES = 50000
+DB_COMMAND_TIMEOUT = 5  # секунд
+DB_CONNECT_TIMEOUT = 5  # секунд, на установку одного соединения
+DB_STARTUP_TIMEOUT = 10  # секунд, сколько старт ждёт готовности пула
+
+# Фоновая запись статистики использования
+LOG_QUEUE_MAXSIZE = 10000
+LOG_BATCH_SIZE = 200
+LOG_FLUSH_INTERVAL = 3.0  # секунд
+
+# Кэш бонусной информации (секунды / число записей)
+GUEST_CACHE_TTL = 60.0
+GUEST_CACHE_NEGATIVE_TTL = 10.0
+GUEST_CACHE_MAXSIZE = 10000
+
+# Максимум обновлений Telegram, обрабатываемых одновременно
+MAX_INFLIGHT_UPDATES = 100
+
+# Параметры вебхука: Telegram по умолчанию держит не более 40 соединений
+WEBHOOK_MAX_CONNECTIONS = 100
+WEBHOOK_ALLOWED_UPDATES = ["message"]
+
+# Более длинные строки не кэшируются: телефоны короче, а вход приходит извне
+MAX_CACHED_PHONE_LEN = 32
+
 # --- /Константы ---
 
 
-settings = get_settings()
+# Таблица для str.translate: удаляет все нецифровые символы Latin-1
+LATIN1_NON_DIGITS = str.maketrans("", "", "".join(chr(c) for c in range(256) if not chr(c).isdigit()))
+
+
+def _digits_only(phone: str) -> str:
+    digits = phone.translate(LATIN1_NON_DIGITS)
+    if not digits or digits.isdigit():
+        return digits
+    # Остались символы вне Latin-1 — редкий случай, фильтруем посимвольно
+    return "".join(ch for ch in digits if ch.isdigit())
+
+
+@lru_cache(maxsize=4096)
+def _normalize_phone_str(phone: str) -> str:
+    # Telegram почти всегда присылает номер в виде +7XXXXXXXXXX
+    if phone[:1] == "+" and phone[1:].isdigit():
+        digits = phone[1:]
+    else:
+        digits = _digits_only(phone)
+    return digits[-10:] if len(digits) >= 10 else digits
+
+
+def _plus_one_year(value: datetime) -> datetime:
+    try:
+        return value.replace(year=value.year + 1)
+    except ValueError:  # 29 февраля
+        return value.replace(year=value.year + 1, day=28)
+
+
+@lru_cache(maxsize=1024)
+def _expire_date_for(last_visit: datetime) -> str:
+    expire = _plus_one_year(last_visit)
+    return f"{expire.day:02d}.{expire.month:02d}.{expire.year:04d}"
+
+
+@lru_cache(maxsize=4096)
+def render_balance_message(first_name: str, amount: int, level: str, expire_date: str) -> str:
+    """Текст ответа с балансом; срок действия указывается только для ненулевого баланса."""
+    text = f"👋 {first_name}, у Вас накоплено бонусов {amount} рублей.\nВаш уровень лояльности — {level}."
+    if amount > 0:
+        text += f"\nСрок действия бонусов: до {expire_date}."
+    return text
+
+
+def mask_phone(phone: str, visible_digits: int = 4) -> str:
+    """Маскирование номера телефона для записи в логи."""
+    if phone and len(phone) > MAX_CACHED_PHONE_LEN:
+        return _mask_phone.__wrapped__(phone, visible_digits)
+    return _mask_phone(phone, visible_digits)
+
+
+@lru_cache(maxsize=4096)
+def _mask_phone(phone: str, visible_digits: int) -> str:
+    if not phone:
+        return ""
+    digits = phone if phone.isdigit() else _digits_only(phone)
+    hidden = max(len(digits) - visible_digits, 0)
+    return "*" * hidden + digits[hidden:]
+
 
 bot = Bot(token=settings.telegram_bot_token)
 dp = Dispatcher()
 
+START_KEYBOARD = ReplyKeyboardMarkup(
+    keyboard=[
+        [KeyboardButton(text=BTN_SHARE_PHONE, request_contact=True)]
+    ],
+    resize_keyboard=True
+)
+
 
 class BotService:
+    __slots__ = (
+        "_dsn",
+        "_min_size",
+        "_max_size",
+        "_pool",
+        "_pool_task",
+        "_log_queue",
+        "_log_worker_task",
+        "_dropped_stats",
+        "_guest_cache",
+    )
+
     def __init__(self, dsn: str, min_size: int, max_size: int):
         self._dsn = dsn
         self._min_size = min_size
         self._max_size = max_size
         self._pool: Optional[asyncpg.Pool] = None
-        self._pool_lock = asyncio.Lock()
+        self._pool_task: Optional[asyncio.Task] = None
+        # Очередь создаётся в start(), внутри работающего цикла событий
+        self._log_queue: Optional[asyncio.Queue[Optional[tuple[int, str, str]]]] = None
+        self._log_worker_task: Optional[asyncio.Task] = None
+        self._dropped_stats = 0
+        # Телефон -> (момент истечения, данные гостя или None)
+        self._guest_cache: OrderedDict[str, tuple[float, Optional[dict[str, Any]]]] = OrderedDict()
 
     def _pool_active(self) -> bool:
-        return bool(
-            self._pool
-            and not getattr(self._pool, "_closing", False)
-            and not getattr(self._pool, "_closed", False)
-        )
+        pool = self._pool
+        return pool is not None and not pool.is_closing()
 
     async def _ensure_pool(self) -> asyncpg.Pool:
         if self._pool_active():
             return self._pool
-
-        async with self._pool_lock:
-            if self._pool_active():
-                return self._pool
-            logger.info("Creating DB pool")
-            try:
-                self._pool = await asyncpg.create_pool(
-                    self._dsn,
-                    min_size=self._min_size,
-                    max_size=self._max_size,
-                )
-                logger.info("DB pool created")
-            except Exception as exc:
-                logger.exception("Failed to create DB pool")
-                self._pool = None
-                raise RuntimeError("Database pool is unavailable") from exc
-            return self._pool
+        # Все ожидающие разделяют одну задачу создания пула; отмена одного
+        # запроса не прерывает подключение для остальных.
+        if self._pool_task is None or self._pool_task.done():
+            self._pool_task = asyncio.create_task(self._create_pool())
+        return await asyncio.shield(self._pool_task)
+
+    async def _create_pool(self) -> asyncpg.Pool:
+        logger.info("Creating DB pool")
+        try:
+            pool = await asyncpg.create_pool(
+                self._dsn,
+                min_size=self._min_size,
+                max_size=self._max_size,
+                max_inactive_connection_lifetime=POOL_MAX_INACTIVE_LIFETIME,
+                max_queries=POOL_MAX_QUERIES,
+                command_timeout=DB_COMMAND_TIMEOUT,
+                timeout=DB_CONNECT_TIMEOUT,
+            )
+            logger.info("DB pool created")
+        except Exception as exc:
+            logger.exception("Failed to create DB pool")
+            raise RuntimeError("Database pool is unavailable") from exc
+        await self._check_server_capacity(pool)
+        self._pool = pool
+        return pool
+
+    async def connect(self) -> None:
+        """Создание пула заранее, чтобы первые запросы не ждали подключения к БД."""
+        await self._ensure_pool()
+
+    async def _check_server_capacity(self, pool: asyncpg.Pool) -> None:
+        """Предупреждение, если пул может занять почти все соединения сервера."""
+        try:
+            max_connections = int(await pool.fetchval("SHOW max_connections"))
+        except Exception:
+            logger.exception("Failed to read max_connections")
+            return
+        if self._max_size > max_connections * 0.8:
+            logger.warning(
+                "POOL_MAX_SIZE={} per process exceeds 80% of server max_connections={}",
+                self._max_size,
+                max_connections,
+            )
 
     async def close(self) -> None:
-        async with self._pool_lock:
-            if not self._pool_active():
-                return
-            try:
-                await self._pool.close()
-                logger.info("DB pool closed")
-            except Exception:
-                logger.exception("Failed to close DB pool")
-            finally:
-                self._pool = None
+        await self._stop_log_worker()
+        task, self._pool_task = self._pool_task, None
+        if task is not None and not task.done():
+            await asyncio.gather(task, return_exceptions=True)
+        if not self._pool_active():
+            self._pool = None
+            return
+        pool, self._pool = self._pool, None
+        try:
+            await pool.close()
+            logger.info("DB pool closed")
+        except Exception:
+            logger.exception("Failed to close DB pool")
 
     @staticmethod
     def normalize_phone(phone: str) -> str:
-        digits = ''.join(ch for ch in (phone or "") if ch.isdigit())
-        return digits[-10:] if len(digits) >= 10 else digits
+        phone = str(phone or "")
+        if len(phone) > MAX_CACHED_PHONE_LEN:
+            return _normalize_phone_str.__wrapped__(phone)
+        return _normalize_phone_str(phone)
 
-    async def fetch_user_row(self, phone_number: str) -> Optional[asyncpg.Record]:
-        """Получение строки пользователя по телефону."""
-        clean_phone = self.normalize_phone(phone_number)
-        if not clean_phone:
-            return None
-        query = SQL_FETCH_USER
-        try:
-            pool = await self._ensure_pool()
-            async with pool.acquire() as conn:
-                return await conn.fetchrow(query, clean_phone)
-        except RuntimeError:
-            raise
-        except Exception:
-            logger.exception("Database query failed")
-            return None
+    async def _query_user_row(self, clean_phone: str) -> Optional[asyncpg.Record]:
+        pool = await self._ensure_pool()
+        return await pool.fetchrow(SQL_FETCH_USER, clean_phone)
 
     def parse_guest_info(self, row: Optional[asyncpg.Record]) -> Optional[dict[str, Any]]:
         """Конвертация строки БД в user dict для выдачи в боте."""
         if not row:
             return None
-        row_dict = dict(row)
-        last_visit: Optional[datetime] = row_dict.get(COL_LAST_DATE_VISIT)
+        first_name, loyalty_level, bonus_balances, last_visit = row
         if not last_visit:
             expire_date = "Неизвестно"
         else:
             try:
-                expire_date = (last_visit + relativedelta(months=12)).strftime("%d.%m.%Y")
+                expire_date = _expire_date_for(last_visit)
             except Exception as e:
                 logger.warning(f"Failed to calculate expire date for {last_visit}: {e}")
                 expire_date = "Неизвестно"
         return {
-            "first_name": row_dict.get(COL_FIRST_NAME) or "Гость",
-            "loyalty_level": row_dict.get(COL_LOYALTY_LEVEL) or "—",
-            "bonus_balances": row_dict.get(COL_BONUS_BALANCES) or 0,
+            "first_name": first_name or "Гость",
+            "loyalty_level": loyalty_level or "—",
+            "bonus_balances": self.format_bonus_amount(bonus_balances or 0),
             "expire_date": expire_date,
         }
 
     async def get_guest_bonus(self, phone_number: str) -> Optional[dict[str, Any]]:
         """Единая точка входа во всю бизнес-логику выдачи бонусов."""
-        if not phone_number:
+        clean_phone = self.normalize_phone(phone_number)
+        if not clean_phone:
             return None
-        row = await self.fetch_user_row(phone_number)
-        return self.parse_guest_info(row)
-
-    async def log_usage_stat(self, user_id: int, phone: str, command: str) -> None:
-        """Запись события использования бота."""
-        query = SQL_LOG_USAGE
+        cached = self._guest_cache.get(clean_phone)
+        if cached is not None and cached[0] > time.monotonic():
+            self._guest_cache.move_to_end(clean_phone)
+            return cached[1]
         try:
-            pool = await self._ensure_pool()
-            async with pool.acquire() as conn:
-                await conn.execute(query, user_id, phone, command)
+            row = await self._query_user_row(clean_phone)
+        except RuntimeError:
+            raise
         except Exception:
-            logger.exception("Failed to log usage stat")
+            # Ошибки БД не кэшируются, чтобы следующий запрос повторил попытку
+            logger.exception("Database query failed")
+            return None
+        guest_info = self.parse_guest_info(row)
+        self._remember_guest(clean_phone, guest_info)
+        return guest_info
+
+    def _remember_guest(self, clean_phone: str, guest_info: Optional[dict[str, Any]]) -> None:
+        ttl = GUEST_CACHE_TTL if guest_info is not None else GUEST_CACHE_NEGATIVE_TTL
+        self._guest_cache[clean_phone] = (time.monotonic() + ttl, guest_info)
+        self._guest_cache.move_to_end(clean_phone)
+        if len(self._guest_cache) > GUEST_CACHE_MAXSIZE:
+            self._guest_cache.popitem(last=False)
 
     @staticmethod
     def format_bonus_amount(value: Any) -> int:
         """Безопасное преобразование бонусного баланса к int."""
+        try:
+            # asyncpg отдаёт NUMERIC как Decimal, а int() приводит его без разбора строки
+            return int(value)
+        except (TypeError, ValueError, OverflowError):
+            pass
         try:
             return int(Decimal(str(value)))
-        except (InvalidOperation, TypeError, ValueError):
-            logger.warning("Could not convert bonus_balances '%s' to int", value)
+        except (InvalidOperation, TypeError, ValueError, OverflowError):
+            logger.warning("Could not convert bonus_balances '{}' to int", value)
             return 0
 
+    def log_usage_stat(self, user_id: int, phone: str, command: str) -> None:
+        """Постановка события использования бота в очередь на запись."""
+        # При переполнении событие отбрасывается; итог сообщается раз за сброс пачки
+        if self._log_queue is None:
+            self._dropped_stats += 1
+            return
+        try:
+            self._log_queue.put_nowait((user_id, phone, command))
+        except asyncio.QueueFull:
+            self._dropped_stats += 1
+
+    def start(self) -> None:
+        """Запуск фоновой записи статистики использования."""
+        if self._log_worker_task is None:
+            self._log_queue = asyncio.Queue(maxsize=LOG_QUEUE_MAXSIZE)
+            self._log_worker_task = asyncio.create_task(self._log_worker())
+
+    async def _log_worker(self) -> None:
+        # Пачка пишется, когда набралось LOG_BATCH_SIZE событий или прошло
+        # LOG_FLUSH_INTERVAL с первого из них; None — сигнал остановки.
+        stopping = False
+        while not stopping:
+            item = await self._log_queue.get()
+            deadline = time.monotonic() + LOG_FLUSH_INTERVAL
+            rows: list[tuple[int, str, str]] = []
+            while item is not None:
+                rows.append(item)
+                timeout = deadline - time.monotonic()
+                if len(rows) >= LOG_BATCH_SIZE or timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._log_queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                stopping = True
+            if rows:
+                await self._write_usage_stats(rows)
+            self._report_dropped_stats()
+
+    async def _write_usage_stats(self, rows: list[tuple[int, str, str]]) -> None:
+        try:
+            pool = await self._ensure_pool()
+            await pool.executemany(SQL_LOG_USAGE, rows)
+        except Exception:
+            logger.exception("Failed to log {} usage stats", len(rows))
+
+    def _report_dropped_stats(self) -> None:
+        if self._dropped_stats:
+            logger.warning("Dropped {} usage stats: queue full or worker not running", self._dropped_stats)
+            self._dropped_stats = 0
+
+    async def _stop_log_worker(self) -> None:
+        task, self._log_worker_task = self._log_worker_task, None
+        if task is None:
+            return
+        if not task.done():
+            await self._log_queue.put(None)
+        (result,) = await asyncio.gather(task, return_exceptions=True)
+        if isinstance(result, BaseException):
+            logger.opt(exception=result).error("Usage stat worker failed")
+        self._log_queue = None
+        self._report_dropped_stats()
+
+
+bot_service = BotService(
+    dsn=str(settings.database_url),
+    min_size=settings.pool_min_size,
+    max_size=settings.pool_max_size,
+)
+
+
+async def _set_webhook(url: str) -> None:
+    try:
+        logger.info("Setting Telegram webhook to {}", url)
+        await bot.set_webhook(
+            url,
+            max_connections=WEBHOOK_MAX_CONNECTIONS,
+            allowed_updates=WEBHOOK_ALLOWED_UPDATES,
+            drop_pending_updates=False,
+        )
+        logger.info("Webhook set")
+    except Exception:
+        logger.exception("Failed to set webhook (continuing without webhook)")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    bot_service = BotService(
-        dsn=str(settings.database_url),
-        min_size=settings.pool_min_size,
-        max_size=settings.pool_max_size,
-    )
     app.state.bot_service = bot_service
+    bot_service.start()
     app.state.settings = settings
 
+    # Регистрация вебхука идёт параллельно с подключением к БД и не задерживает старт
+    webhook_task: Optional[asyncio.Task] = None
     if settings.webhook_url:
+        webhook_task = asyncio.create_task(_set_webhook(str(settings.webhook_url)))
+
+    try:
+        # По таймауту создание пула продолжается в фоне
+        await asyncio.wait_for(bot_service.connect(), DB_STARTUP_TIMEOUT)
+    except (RuntimeError, asyncio.TimeoutError):
+        logger.warning("DB is unavailable at startup; the pool will be created on demand")
+    yield
+    logger.info("Shutting down: finishing updates and closing pool")
+    if webhook_task is not None and not webhook_task.done():
+        webhook_task.cancel()
+        await asyncio.gather(webhook_task, return_exceptions=True)
+    # Дождаться ответов по уже принятым обновлениям до закрытия пула
+    await asyncio.gather(*_pending_updates, return_exceptions=True)
+    if settings.delete_webhook_on_shutdown:
         try:
-            logger.info("Setting Telegram webhook to %s", settings.webhook_url)
-            await bot.set_webhook(str(settings.webhook_url))
-            logger.info("Webhook set")
+            await bot.delete_webhook()
+            logger.info("Webhook deleted")
         except Exception:
-            logger.exception("Failed to set webhook (continuing without webhook)")
-    yield
-    logger.info("Shutting down: deleting webhook and closing pool")
-    try:
-        await bot.delete_webhook()
-    except Exception:
-        logger.exception("Failed to delete webhook (ignoring)")
+            logger.exception("Failed to delete webhook (ignoring)")
     await bot_service.close()
 
 
@@ -237,38 +474,32 @@ Instrumentator().instrument(app).expose(app, endpoint="/metrics")
 
 @dp.message(CommandStart())
 async def cmd_start(message: types.Message):
-    keyboard = ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text=BTN_SHARE_PHONE, request_contact=True)]
-        ],
-        resize_keyboard=True
-    )
-    await message.answer(MSG_START, reply_markup=keyboard)
+    await message.answer(MSG_START, reply_markup=START_KEYBOARD)
 
 
 @dp.message(F.contact)
 async def handle_contact(message: types.Message):
+    contact = message.contact
+    user_id = message.from_user.id if message.from_user else None
+
     # --- ПРОВЕРКА: принадлежит ли контакт отправителю ---
-    if message.contact.user_id != message.from_user.id:
+    if user_id is None or contact.user_id != user_id:
         await message.answer(MSG_INVALID_CONTACT)
         return
     # --- КОНЕЦ ПРОВЕРКИ ---
 
-    phone_number = message.contact.phone_number
-    user_id = message.from_user.id
-    logger.info("Received contact from %s (user_id=%s)", phone_number, user_id)
-    bot_service = app.state.bot_service
+    phone_number = contact.phone_number
+    logger.opt(lazy=True).debug(
+        "Received contact from {} (user_id={})", lambda: mask_phone(phone_number), lambda: user_id
+    )
 
-    # Записать событие
-    try:
-        await bot_service.log_usage_stat(user_id=user_id, phone=phone_number, command="contact")
-    except Exception as e:  # Логируем ошибку логирования, но не прерываем основной процесс
-        logger.error(f"Failed to log usage stat for user {user_id}: {e}")
+    # Записать событие (в фоне, без ожидания БД)
+    bot_service.log_usage_stat(user_id=user_id, phone=phone_number, command="contact")
 
     try:
         guest_info = await bot_service.get_guest_bonus(phone_number)
     except Exception as e:
-        logger.error(f"Failed to fetch bonus info for phone {phone_number} (user_id={user_id}): {e}")
+        logger.error(f"Failed to fetch bonus info for phone {mask_phone(phone_number)} (user_id={user_id}): {e}")
         await message.answer("Произошла ошибка при получении данных. Попробуйте позже.")
         return
 
@@ -276,15 +507,12 @@ async def handle_contact(message: types.Message):
         await message.answer(MSG_NO_BONUS)
         return
 
-    bonus_amount = bot_service.format_bonus_amount(guest_info['bonus_balances'])
-
-    response_text = MSG_BALANCE_TEMPLATE.format(
+    response_text = render_balance_message(
         first_name=guest_info['first_name'],
-        amount=bonus_amount,
-        level=guest_info['loyalty_level']
+        amount=guest_info['bonus_balances'],
+        level=guest_info['loyalty_level'],
+        expire_date=guest_info['expire_date'],
     )
-    if bonus_amount > 0:
-        response_text += MSG_EXPIRY_TEMPLATE.format(date=guest_info['expire_date'])
 
     try:
         await message.answer(response_text)
@@ -292,28 +520,59 @@ async def handle_contact(message: types.Message):
         logger.error(f"Failed to send response to user {user_id}: {e}")
 
 
+# Ответы с постоянным содержимым создаются один раз и переиспользуются
+_OK_EMPTY = Response(status_code=status.HTTP_200_OK)
+_ROOT_RESPONSE = Response(orjson.dumps({"status": "ok"}), media_type="application/json")
+
+_update_slots = asyncio.Semaphore(MAX_INFLIGHT_UPDATES)
+_pending_updates: set[asyncio.Task] = set()
+
+
+async def _process_update(update: Update) -> None:
+    try:
+        await dp.feed_update(bot, update)
+    except Exception:
+        logger.exception("Failed to feed update")
+    finally:
+        _update_slots.release()
+
+
 @app.post("/webhook")
 async def telegram_webhook(request: Request):
     try:
-        data = await request.json()
-    except JSONDecodeError:
+        data = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
         logger.warning("Non-JSON body received on /webhook")
         return Response(status_code=status.HTTP_400_BAD_REQUEST)
+    if not isinstance(data, dict):
+        logger.warning("Non-object JSON body received on /webhook")
+        return Response(status_code=status.HTTP_400_BAD_REQUEST)
 
-    logger.info("Webhook received: %s", data.get("message") or data.get("update_id"))
+    logger.opt(lazy=True).debug("Webhook received: update_id={}", lambda: data.get("update_id"))
     try:
-        update = Update(**data)
-    except Exception:
+        update = Update.model_validate(data, context={"bot": bot})
+    except ValidationError:
         logger.exception("Failed to parse update")
         return Response(status_code=status.HTTP_400_BAD_REQUEST)
-    try:
-        await dp.feed_update(bot, update)
-    except Exception:
-        logger.exception("Failed to feed update")
-    return Response(status_code=status.HTTP_200_OK)
+    # Ответ Telegram отдаётся сразу, обработка идёт в фоне; при переполнении
+    # вебхук ждёт свободного слота, не накапливая задачи без ограничений.
+    await _update_slots.acquire()
+    task = asyncio.create_task(_process_update(update))
+    _pending_updates.add(task)
+    task.add_done_callback(_pending_updates.discard)
+    return _OK_EMPTY
 
 
 @app.get("/")
 async def root():
-    return {"status": "ok"}
+    return _ROOT_RESPONSE
+
+
+def run_server() -> None:
+    import uvicorn
+
+    uvicorn.run(app, host="0.0.0.0", port=settings.port, access_log=False)
+
 
+if __name__ == "__main__":
+    run_server()
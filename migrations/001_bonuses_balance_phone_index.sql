@@ -0,0 +1,4 @@
+-- Индекс для поиска бонусов по телефону (SQL_FETCH_USER: WHERE phone = $1).
+-- CONCURRENTLY не блокирует запись в таблицу, но не может выполняться внутри транзакции.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_bonuses_balance_phone
+    ON bonuses_balance (phone);